@@ -1,86 +1,59 @@
 import asyncio
-import asyncpg
 import structlog
 import re
 from aiogram import Bot, Dispatcher
-from aiogram.enums import ParseMode, UpdateType
+from aiogram.enums import UpdateType
 from aiogram.types import BotCommand, BotCommandScopeChat
-from aiogram.client.default import DefaultBotProperties
-from os import getenv
-from dotenv import load_dotenv
-from redis.asyncio import from_url
-from app.dao import LessonDAO
+from app.config import (
+    DATABASE_URL,
+    FAST_RUNTIME,
+    LOOP_STALL_THRESHOLD_MS,
+    OWNER_TGID,
+    PAYMENT_LINK,
+    SHARD_WORKERS,
+    create_bot,
+    create_redis,
+    setup_logging,
+)
+from app.db import Database, connect
+from app.groups import Groups
 from app.middlewares import LoggingMiddleware, OnlyOwnerMiddleware
+from app.profiling import LoopWatchdog
 from app.router import router
+from app.runtime import describe, loop_factory
 from app.schedule import Schedule
-from pathlib import Path
+from app.sharding import ShardRouter
 
-load_dotenv()
 
+async def apply_migrations(db: Database) -> None:
+    """Автоматически применяет SQL миграции из папки миграций бэкенда"""
 
-def get_required_envvar(key: str) -> str:
-    if var := getenv(key):
-        return var
-    else:
-        raise RuntimeError(f"{key} is not found in .env!")
+    current_version = await db.schema_version()
 
+    migration_files = sorted(
+        db.migrations_dir.glob("*.sql"),
+        key=lambda f: int(
+            matches.group(1) if (matches := re.match(r"^(\d+)_", f.name)) else ""
+        ),
+    )
 
-BOT_TOKEN = get_required_envvar("BOT_TOKEN")
-DATABASE_URL = get_required_envvar("DATABASE_URL")
-REDIS_URL = get_required_envvar("REDIS_URL")
-OWNER_TGID = int(get_required_envvar("OWNER_TGID"))
-PAYMENT_LINK = getenv("PAYMENT_LINK", "")
-
-
-async def apply_migrations(pool: asyncpg.Pool) -> None:
-    """Автоматически применяет SQL миграции из папки migrations/"""
-
-    async with pool.acquire() as conn:
-        await conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS schema_version (
-                version INT PRIMARY KEY,
-                filename VARCHAR(255) NOT NULL,
-                applied_at TIMESTAMP DEFAULT NOW()
-            )
-        """
-        )
-
-        current_version = await conn.fetchval(
-            "SELECT COALESCE(MAX(version), 0) FROM schema_version"
-        )
-
-        migrations_dir = Path("migrations")
-        migration_files = sorted(
-            migrations_dir.glob("*.sql"),
-            key=lambda f: int(
-                matches.group(1) if (matches := re.match(r"^(\d+)_", f.name)) else ""
-            ),
-        )
-
-        for migration_file in migration_files:
-            match = re.match(r"^(\d+)_", migration_file.name)
-            if not match:
-                continue
-
-            version = int(match.group(1))
+    for migration_file in migration_files:
+        match = re.match(r"^(\d+)_", migration_file.name)
+        if not match:
+            continue
 
-            if version <= current_version:
-                continue
+        version = int(match.group(1))
 
-            print(f"Applying migration {version}: {migration_file.name}")
+        if version <= current_version:
+            continue
 
-            with open(migration_file) as f:
-                sql = f.read()
-                await conn.execute(sql)
+        print(f"Applying migration {version}: {migration_file.name}")
 
-            await conn.execute(
-                "INSERT INTO schema_version (version, filename) VALUES ($1, $2)",
-                version,
-                migration_file.name,
-            )
+        with open(migration_file) as f:
+            sql = f.read()
+            await db.apply_migration(version, migration_file.name, sql)
 
-            print(f"✅ Migration {version} applied")
+        print(f"✅ Migration {version} applied")
 
 
 async def set_commands(bot: Bot) -> None:
@@ -90,45 +63,50 @@ async def set_commands(bot: Bot) -> None:
         BotCommand(command="list", description="Показать расписание"),
         BotCommand(command="delete", description="Удалить урок"),
         BotCommand(command="cancel", description="Отменить урок"),
+        BotCommand(command="update", description="Изменить урок"),
+        BotCommand(command="profile", description="Профилировать бота"),
     ]
     await bot.set_my_commands(commands, scope=BotCommandScopeChat(chat_id=OWNER_TGID))
 
 
 async def main() -> None:
-    structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.processors.add_log_level,
-            structlog.processors.StackInfoRenderer(),
-            structlog.dev.set_exc_info,
-            structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S", utc=False),
-            structlog.dev.ConsoleRenderer(),
-        ]
-    )
+    setup_logging()
+
+    watchdog = LoopWatchdog(threshold=LOOP_STALL_THRESHOLD_MS / 1000)
+    watchdog.start()
 
-    pool = await asyncpg.create_pool(DATABASE_URL)
-    await apply_migrations(pool)
+    db = await connect(DATABASE_URL)
+    await apply_migrations(db)
 
-    redis = await from_url(REDIS_URL)
+    redis = await create_redis()
 
-    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    bot = create_bot()
+    await structlog.get_logger().ainfo("Runtime", **describe(bot.session))  # type: ignore
     dp = Dispatcher()
     dp.update.middleware(LoggingMiddleware())
     dp.update.middleware(OnlyOwnerMiddleware(OWNER_TGID))
     dp.include_router(router)
 
-    dao = LessonDAO(pool)
+    dao = db.lesson_dao()
+    groups = Groups(bot, redis, OWNER_TGID)
+    await groups.index_chats()
     schedule = Schedule(dao)
+    if SHARD_WORKERS:
+        # Напоминания рассылают процессы app.worker, здесь только команды
+        schedule.route_to_shards(ShardRouter(redis))
     schedule.start()
-    schedule.setup_reminders(bot, redis, PAYMENT_LINK)
+    schedule.setup_reminders(groups, redis, PAYMENT_LINK)
     await schedule.load()
     schedule.setup_payment_reminders()
+    await schedule.pause_inactive_groups()
 
     await set_commands(bot)
     await dp.start_polling(  # type: ignore
         bot,
         schedule=schedule,
         redis=redis,
+        groups=groups,
+        watchdog=watchdog,
         allowed_updates=[
             UpdateType.MESSAGE,
             UpdateType.CHAT_JOIN_REQUEST,
@@ -138,4 +116,4 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(), loop_factory=loop_factory(FAST_RUNTIME))
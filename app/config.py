@@ -0,0 +1,69 @@
+from os import getenv
+
+import structlog
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from aiogram.enums import ParseMode
+from dotenv import load_dotenv
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.runtime import create_session
+
+load_dotenv()
+
+
+def get_required_envvar(key: str) -> str:
+    if var := getenv(key):
+        return var
+    else:
+        raise RuntimeError(f"{key} is not found in .env!")
+
+
+BOT_TOKEN = get_required_envvar("BOT_TOKEN")
+DATABASE_URL = get_required_envvar("DATABASE_URL")
+REDIS_URL = get_required_envvar("REDIS_URL")
+OWNER_TGID = int(get_required_envvar("OWNER_TGID"))
+PAYMENT_LINK = getenv("PAYMENT_LINK", "")
+LOOP_STALL_THRESHOLD_MS = int(getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+FAST_RUNTIME = getenv("FAST_RUNTIME", "") == "1"
+HTTP_POOL_SIZE = int(getenv("HTTP_POOL_SIZE", "100"))
+REDIS_POOL_SIZE = int(getenv("REDIS_POOL_SIZE", "50"))
+BOT_API_URL = getenv("BOT_API_URL")
+SHARD_WORKERS = int(getenv("SHARD_WORKERS", "0"))
+WORKER_ID = getenv("WORKER_ID")
+
+
+def setup_logging() -> None:
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
+            structlog.processors.StackInfoRenderer(),
+            structlog.dev.set_exc_info,
+            structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S", utc=False),
+            structlog.dev.ConsoleRenderer(),
+        ]
+    )
+
+
+def create_bot() -> Bot:
+    session = create_session(
+        FAST_RUNTIME,
+        pool_size=HTTP_POOL_SIZE,
+        api=TelegramAPIServer.from_base(BOT_API_URL) if BOT_API_URL else PRODUCTION,
+    )
+    return Bot(
+        token=BOT_TOKEN,
+        session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+
+
+def create_redis() -> Redis:
+    """В пиковую минуту сотни напоминаний ждут свободное соединение,
+    а не падают с MaxConnectionsError, как с обычным пулом"""
+    pool = BlockingConnectionPool.from_url(  # type: ignore
+        REDIS_URL, max_connections=REDIS_POOL_SIZE, timeout=None
+    )
+    return Redis(connection_pool=pool)
@@ -1,9 +1,37 @@
+from datetime import time
+from typing import Any, Protocol
+
+from aiosqlite import Connection, Row
 from asyncpg import Pool, Record
 
+from app.forms import LessonPartial
 from app.models import Lesson
 
+COLUMNS = {
+    "group_n": "group_n",
+    "day": "day_of_week",
+    "start_time": "start_time",
+    "subject": "subject",
+}
+
+
+def changed_columns(changes: LessonPartial) -> dict[str, Any]:
+    """Колонки и новые значения для UPDATE: только переданные (не None) поля"""
+    values = changes.model_dump(exclude_none=True)
+    return {COLUMNS[name]: value for name, value in values.items()}
+
+
+class LessonDAO(Protocol):
+    async def insert(self, lesson: Lesson) -> int: ...
 
-class LessonDAO:
+    async def get_all(self) -> list[tuple[int, Lesson]]: ...
+
+    async def update(self, lesson_id: int, changes: LessonPartial) -> None: ...
+
+    async def delete(self, lesson_id: int) -> None: ...
+
+
+class PostgresLessonDAO:
     def __init__(self, pool: Pool) -> None:
         self._pool = pool
 
@@ -31,13 +59,17 @@ class LessonDAO:
             for row in rows
         ]
 
-    async def update(self, lesson_id: int, new_lesson: Lesson) -> None:
+    async def update(self, lesson_id: int, changes: LessonPartial) -> None:
+        values = changed_columns(changes)
+        if not values:
+            return
+
+        assignments = ", ".join(
+            f"{column}=${i}" for i, column in enumerate(values, start=1)
+        )
         await self._pool.execute(
-            "UPDATE lessons SET group_n=$1, day_of_week=$2, start_time=$3, subject=$4 WHERE id=$5",
-            new_lesson.group_n,
-            new_lesson.day,
-            new_lesson.start_time,
-            new_lesson.subject,
+            f"UPDATE lessons SET {assignments} WHERE id=${len(values) + 1}",
+            *values.values(),
             lesson_id,
         )
 
@@ -46,3 +78,65 @@ class LessonDAO:
             "DELETE FROM lessons WHERE id=$1",
             lesson_id,
         )
+
+
+class SQLiteLessonDAO:
+    """Хранение уроков в одном файле SQLite.
+
+    Все запросы параметризованы, поэтому sqlite3 берёт уже подготовленные
+    выражения из своего кэша. Время хранится строкой `HH:MM:SS` в UTC.
+    """
+
+    def __init__(self, conn: Connection) -> None:
+        self._conn = conn
+
+    async def insert(self, lesson: Lesson) -> int:
+        cursor = await self._conn.execute(
+            "INSERT INTO lessons (group_n, day_of_week, start_time, subject) VALUES (?, ?, ?, ?) RETURNING id",
+            (
+                lesson.group_n,
+                lesson.day,
+                lesson.start_time.isoformat(),
+                lesson.subject,
+            ),
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+        await self._conn.commit()
+        assert row is not None
+        return row[0]
+
+    async def get_all(self) -> list[tuple[int, Lesson]]:
+        rows: list[Row] = list(
+            await self._conn.execute_fetchall("SELECT * FROM lessons")  # type: ignore
+        )
+        return [
+            (
+                row["id"],
+                Lesson(
+                    group_n=row["group_n"],
+                    day=row["day_of_week"],
+                    start_time=time.fromisoformat(row["start_time"]),
+                    subject=row["subject"],
+                ),
+            )
+            for row in rows
+        ]
+
+    async def update(self, lesson_id: int, changes: LessonPartial) -> None:
+        values = changed_columns(changes)
+        if not values:
+            return
+        if "start_time" in values:
+            values["start_time"] = values["start_time"].isoformat()
+
+        assignments = ", ".join(f"{column}=?" for column in values)
+        await self._conn.execute(
+            f"UPDATE lessons SET {assignments} WHERE id=?",
+            (*values.values(), lesson_id),
+        )
+        await self._conn.commit()
+
+    async def delete(self, lesson_id: int) -> None:
+        await self._conn.execute("DELETE FROM lessons WHERE id=?", (lesson_id,))
+        await self._conn.commit()
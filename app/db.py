@@ -0,0 +1,130 @@
+from pathlib import Path
+from typing import Protocol
+
+import aiosqlite
+import asyncpg
+
+from app.dao import LessonDAO, PostgresLessonDAO, SQLiteLessonDAO
+
+MIGRATIONS_DIR = Path("migrations")
+
+
+class Database(Protocol):
+    """Бэкенд хранения: соединение, миграции и DAO поверх них"""
+
+    migrations_dir: Path
+
+    async def schema_version(self) -> int: ...
+
+    async def apply_migration(self, version: int, filename: str, sql: str) -> None: ...
+
+    def lesson_dao(self) -> LessonDAO: ...
+
+    async def close(self) -> None: ...
+
+
+class PostgresDatabase:
+    migrations_dir = MIGRATIONS_DIR
+
+    def __init__(self, pool: asyncpg.Pool) -> None:
+        self._pool = pool
+
+    @classmethod
+    async def connect(cls, url: str) -> "PostgresDatabase":
+        return cls(await asyncpg.create_pool(url))
+
+    async def schema_version(self) -> int:
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    filename VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT NOW()
+                )
+            """
+            )
+            return await conn.fetchval(
+                "SELECT COALESCE(MAX(version), 0) FROM schema_version"
+            )
+
+    async def apply_migration(self, version: int, filename: str, sql: str) -> None:
+        async with self._pool.acquire() as conn:
+            await conn.execute(sql)
+            await conn.execute(
+                "INSERT INTO schema_version (version, filename) VALUES ($1, $2)",
+                version,
+                filename,
+            )
+
+    def lesson_dao(self) -> LessonDAO:
+        return PostgresLessonDAO(self._pool)
+
+    async def close(self) -> None:
+        await self._pool.close()
+
+
+class SQLiteDatabase:
+    """Встроенная база для установок на одном сервере.
+
+    WAL позволяет читать во время записи, а `synchronous=NORMAL` в WAL
+    не делает fsync на каждый коммит, сохраняя целостность файла.
+    """
+
+    migrations_dir = MIGRATIONS_DIR / "sqlite"
+
+    def __init__(self, conn: aiosqlite.Connection) -> None:
+        self._conn = conn
+
+    @classmethod
+    async def connect(cls, path: str) -> "SQLiteDatabase":
+        conn = await aiosqlite.connect(path, cached_statements=256)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute("PRAGMA foreign_keys=ON")
+        await conn.execute("PRAGMA busy_timeout=5000")
+        return cls(conn)
+
+    async def schema_version(self) -> int:
+        await self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                filename VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        async with self._conn.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM schema_version"
+        ) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    async def apply_migration(self, version: int, filename: str, sql: str) -> None:
+        # Миграция и запись о ней попадают в одну транзакцию
+        await self._conn.executescript(f"BEGIN;\n{sql}\n;")
+        await self._conn.execute(
+            "INSERT INTO schema_version (version, filename) VALUES (?, ?)",
+            (version, filename),
+        )
+        await self._conn.commit()
+
+    def lesson_dao(self) -> LessonDAO:
+        return SQLiteLessonDAO(self._conn)
+
+    async def close(self) -> None:
+        await self._conn.close()
+
+
+async def connect(url: str) -> Database:
+    """`sqlite:///data/bot.db` (относительный путь), `sqlite:////var/bot.db`
+    (абсолютный) или `postgresql://...`
+    """
+    if url.startswith("sqlite://"):
+        path = url.removeprefix("sqlite://").removeprefix("/") or ":memory:"
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        return await SQLiteDatabase.connect(path)
+    return await PostgresDatabase.connect(url)
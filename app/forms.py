@@ -1,14 +1,62 @@
 from pydantic import BaseModel
 from datetime import time
 
-from app.models import Lesson
+from app.models import DayOfWeek, Lesson, parse_day, parse_time
+
+PARTIAL_FIELDS = ("group", "day", "time", "subject")
 
 
 class LessonPartial(BaseModel):
-    day: int | None = None
+    group_n: str | None = None
+    day: DayOfWeek | None = None
     start_time: time | None = None
     subject: str | None = None
 
+    @classmethod
+    def from_str(cls, data: str) -> "LessonPartial":
+        """Разбирает `group=1 day=Вт time=11:00 subject=Физика углублённая`"""
+        values: dict[str, str] = {}
+        key: str | None = None
+        for word in data.split():
+            name, sep, value = word.partition("=")
+            if sep and name in PARTIAL_FIELDS:
+                if name in values:
+                    raise ValueError(f"Field '{name}' is given twice")
+                key = name
+                values[key] = value
+            elif key == "subject":
+                values[key] += f" {word}"
+            else:
+                raise ValueError(f"Unknown field '{word}'")
+
+        if not values:
+            raise ValueError("Nothing to update")
+
+        fields: dict[str, object] = {}
+        if (group_n := values.get("group")) is not None:
+            if not group_n.isnumeric():
+                raise ValueError("Group number must be a number")
+            fields["group_n"] = group_n
+        if (day_str := values.get("day")) is not None:
+            fields["day"] = parse_day(day_str)
+        if (time_str := values.get("time")) is not None:
+            fields["start_time"] = parse_time(time_str)
+        if (subject := values.get("subject")) is not None:
+            if not subject.strip():
+                raise ValueError("Subject must not be empty")
+            fields["subject"] = subject.strip()
+        return cls.model_validate(fields)
+
+    def diff(self, lesson: Lesson) -> "LessonPartial":
+        """Оставляет только поля, которые действительно отличаются от `lesson`"""
+        return LessonPartial(
+            **{
+                name: value
+                for name, value in self.model_dump(exclude_none=True).items()
+                if getattr(lesson, name) != value
+            }
+        )
+
 
 class AddLesson(BaseModel):
     lesson: Lesson
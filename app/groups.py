@@ -0,0 +1,118 @@
+from collections.abc import Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramMigrateToChat,
+)
+from redis.asyncio import Redis
+from structlog import get_logger
+from structlog.types import FilteringBoundLogger
+
+INACTIVE_GROUPS = "inactive_groups"
+
+GroupListener = Callable[[str, bool], Awaitable[None]]
+
+
+class Groups:
+    """Связь "группа <-> chat_id" в Redis и доставка сообщений в группы.
+
+    Чаты, из которых бота выгнали, помечаются неактивными, а группы,
+    ставшие супергруппами, переводятся на новый chat_id. Подписчики
+    (например, `Schedule`) узнают о смене активности через `subscribe`.
+    """
+
+    def __init__(self, bot: Bot, redis: Redis, owner_id: int) -> None:
+        self._bot = bot
+        self._redis = redis
+        self._owner_id = owner_id
+        self._listeners: list[GroupListener] = []
+        self._logger: FilteringBoundLogger = get_logger().bind(event="groups")
+
+    def subscribe(self, listener: GroupListener) -> None:
+        self._listeners.append(listener)
+
+    async def chat_id(self, group_n: str) -> int | None:
+        """chat_id группы, если она подключена и активна"""
+        if await self._redis.sismember(INACTIVE_GROUPS, group_n):  # type: ignore
+            return None
+        chat_id = await self._redis.get(f"group:{group_n}")
+        return int(chat_id) if chat_id else None
+
+    async def inactive(self) -> set[str]:
+        members = await self._redis.smembers(INACTIVE_GROUPS)  # type: ignore
+        return {member.decode() for member in members}
+
+    async def group_of(self, chat_id: int) -> str | None:
+        group_n = await self._redis.get(f"chat:{chat_id}")
+        return group_n.decode() if group_n else None
+
+    async def index_chats(self) -> None:
+        """Обратный индекс `chat:{chat_id}` для групп, подключённых до его появления"""
+        async for key in self._redis.scan_iter(match="group:*"):
+            if chat_id := await self._redis.get(key):
+                group_n = key.decode().removeprefix("group:")
+                await self._redis.set(f"chat:{chat_id.decode()}", group_n)
+
+    async def connect(self, group_n: str, chat_id: int) -> None:
+        old_chat_id = await self._redis.get(f"group:{group_n}")
+        if old_chat_id and int(old_chat_id) != chat_id:
+            await self._redis.delete(f"chat:{old_chat_id.decode()}")
+        await self._redis.set(f"group:{group_n}", str(chat_id))
+        await self._redis.set(f"chat:{chat_id}", group_n)
+        if await self._redis.srem(INACTIVE_GROUPS, group_n):  # type: ignore
+            await self._logger.ainfo("Group %s is active again", group_n)
+            await self._notify(group_n, True)
+
+    async def migrate(self, group_n: str, new_chat_id: int) -> None:
+        # Старый чат мог уже прислать "бот удалён", поэтому заодно и активируем
+        await self.connect(group_n, new_chat_id)
+        await self._logger.ainfo(
+            "Group %s migrated to chat_id=%s", group_n, new_chat_id
+        )
+        await self._tell_owner(
+            f"🔁 Группа {group_n} стала супергруппой, напоминания переключены на неё"
+        )
+
+    async def deactivate(self, group_n: str, reason: str) -> None:
+        if not await self._redis.sadd(INACTIVE_GROUPS, group_n):  # type: ignore
+            return
+        await self._logger.awarning("Group %s is inactive: %s", group_n, reason)
+        await self._notify(group_n, False)
+        await self._tell_owner(
+            f"⚠️ Группа {group_n} недоступна, напоминания для неё остановлены.\n"
+            f"Причина: {reason}\n\n"
+            "Добавьте бота в чат снова, чтобы возобновить их."
+        )
+
+    async def send(self, group_n: str, text: str) -> bool:
+        """Отправляет сообщение в группу, попутно разбираясь с мёртвыми чатами"""
+        chat_id = await self.chat_id(group_n)
+        if chat_id is None:
+            return False
+
+        try:
+            await self._bot.send_message(chat_id, text)
+        except TelegramMigrateToChat as e:
+            await self.migrate(group_n, e.migrate_to_chat_id)
+            await self._bot.send_message(e.migrate_to_chat_id, text)
+        except TelegramForbiddenError as e:
+            await self.deactivate(group_n, e.message)
+            return False
+        except TelegramBadRequest as e:
+            if "chat not found" not in e.message:
+                raise
+            await self.deactivate(group_n, e.message)
+            return False
+        return True
+
+    async def _notify(self, group_n: str, active: bool) -> None:
+        for listener in self._listeners:
+            await listener(group_n, active)
+
+    async def _tell_owner(self, text: str) -> None:
+        try:
+            await self._bot.send_message(self._owner_id, text)
+        except TelegramForbiddenError:
+            await self._logger.awarning("Owner has blocked the bot")
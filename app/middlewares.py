@@ -1,6 +1,7 @@
 from collections.abc import Awaitable, Callable
 from typing import Any, cast
 from aiogram import BaseMiddleware
+from aiogram.enums import ChatMemberStatus
 from aiogram.types import (
     TelegramObject,
     Update,
@@ -59,6 +60,15 @@ class OnlyOwnerMiddleware(BaseMiddleware):
         user_id: int | None = None
 
         match update:
+            # Служебные события про сами чаты приходят не от владельца,
+            # но без них не узнать о миграции группы или удалении бота
+            case Update(message=msg) if msg and msg.migrate_to_chat_id:
+                return await handler(event, data)
+            case Update(my_chat_member=member) if member and (
+                member.new_chat_member.status
+                in (ChatMemberStatus.LEFT, ChatMemberStatus.KICKED)
+            ):
+                return await handler(event, data)
             case Update(message=msg) if msg and msg.from_user:
                 user_id = msg.from_user.id
             case Update(my_chat_member=member) if member and member.from_user:
@@ -17,6 +17,31 @@ def validate_day_of_week(value: int):
 DayOfWeek = Annotated[int, BeforeValidator(validate_day_of_week)]
 
 
+def parse_day(day_str: str) -> int:
+    parsed_day = dateparser.parse(
+        day_str, languages=["ru"], settings={"PREFER_DATES_FROM": "future"}
+    )
+    if not parsed_day:
+        raise ValueError("Unknown day")
+    return parsed_day.weekday()
+
+
+def parse_time(time_str: str) -> time:
+    """Время вводится по МСК, хранится в UTC"""
+    parsed_time = dateparser.parse(
+        time_str,
+        languages=["ru"],
+        settings={
+            "PREFER_DATES_FROM": "future",
+            "TIMEZONE": MSK,
+            "TO_TIMEZONE": UTC,
+        },
+    )
+    if not parsed_time:
+        raise ValueError("Unknown time")
+    return parsed_time.time()
+
+
 class Lesson(BaseModel):
     group_n: str
     day: DayOfWeek
@@ -29,26 +54,10 @@ class Lesson(BaseModel):
             group_n, day_str, time_str, subject = parts
             if not group_n.isnumeric():
                 raise ValueError("Group number must be a number")
-            parsed_day = dateparser.parse(
-                day_str, languages=["ru"], settings={"PREFER_DATES_FROM": "future"}
-            )
-            if not parsed_day:
-                raise ValueError("Unknown day")
-            parsed_time = dateparser.parse(
-                time_str,
-                languages=["ru"],
-                settings={
-                    "PREFER_DATES_FROM": "future",
-                    "TIMEZONE": MSK,
-                    "TO_TIMEZONE": UTC,
-                },
-            )
-            if not parsed_time:
-                raise ValueError("Unknown time")
             return Lesson(
                 group_n=group_n,
-                day=parsed_day.weekday(),
-                start_time=parsed_time.time(),
+                day=parse_day(day_str),
+                start_time=parse_time(time_str),
                 subject=subject.strip(),
             )
         else:
@@ -0,0 +1,157 @@
+import asyncio
+import heapq
+import sys
+import threading
+import traceback
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from time import monotonic, sleep
+from types import FrameType
+
+from structlog import get_logger
+from structlog.types import FilteringBoundLogger
+
+
+@dataclass(order=True)
+class Stall:
+    lag: float
+    at: datetime = field(compare=False)
+    stack: str = field(compare=False)
+
+
+class LoopWatchdog:
+    """Следит за задержками event loop.
+
+    Корутина-пульс засыпает на `interval` и замеряет, насколько позже она
+    проснулась. Фоновый поток видит, что пульса нет дольше `threshold`,
+    и снимает стек потока event loop, пока виновник ещё выполняется.
+    """
+
+    def __init__(
+        self, threshold: float = 0.1, interval: float = 0.05, keep: int = 10
+    ) -> None:
+        self._threshold = threshold
+        self._interval = interval
+        self._keep = keep
+        self._slowest: list[Stall] = []
+        self._last_tick = monotonic()
+        self._pending_stack: str | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._stop = threading.Event()
+        self._logger: FilteringBoundLogger = get_logger().bind(event="watchdog")
+
+    @property
+    def slowest(self) -> list[Stall]:
+        return sorted(self._slowest, reverse=True)
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(
+            target=self._monitor, name="loop-watchdog", daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self._interval
+            await asyncio.sleep(self._interval)
+            lag = loop.time() - expected
+            self._last_tick = monotonic()
+
+            stack, self._pending_stack = self._pending_stack, None
+            if lag < self._threshold:
+                continue
+
+            stall = Stall(lag=lag, at=datetime.now(), stack=stack or "")
+            if len(self._slowest) < self._keep:
+                heapq.heappush(self._slowest, stall)
+            else:
+                heapq.heappushpop(self._slowest, stall)
+
+            await self._logger.awarning(
+                "Event loop was blocked for %.0f ms", lag * 1000, stack=stall.stack
+            )
+
+    def _monitor(self) -> None:
+        # Пульса нет с `threshold` секунд — loop, скорее всего, уже занят.
+        # Проверяем чаще пульса, чтобы успеть снять стек и у коротких блокировок
+        while not self._stop.wait(self._interval / 4):
+            if self._pending_stack is not None:
+                continue
+            if monotonic() - self._last_tick < self._threshold:
+                continue
+            if self._loop_thread_id is None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._pending_stack = "".join(traceback.format_stack(frame))
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_qualname}"
+
+
+class SamplingProfiler:
+    """Сэмплирующий профайлер потока event loop.
+
+    Работает в отдельном потоке и раз в `interval` секунд снимает стек
+    целевого потока, поэтому сам loop почти не нагружает.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005) -> None:
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stacks: Counter[tuple[str, ...]] = Counter()
+
+    @property
+    def samples(self) -> int:
+        return self._stacks.total()
+
+    def sample(self, seconds: float) -> None:
+        deadline = monotonic() + seconds
+        while monotonic() < deadline:
+            frame = sys._current_frames().get(self._thread_id)
+            stack: list[str] = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self._stacks[tuple(reversed(stack))] += 1
+            sleep(self._interval)
+
+    def collapsed(self) -> str:
+        """Формат flamegraph.pl / speedscope: `a;b;c count`"""
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in self._stacks.most_common()
+        )
+
+    def top(self, n: int = 20) -> str:
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self._stacks.items():
+            own[stack[-1]] += count
+            for name in set(stack):
+                total[name] += count
+
+        samples = self.samples or 1
+        lines = [f"Samples: {self.samples}", "", "Self time:"]
+        lines += [
+            f"{count / samples:7.1%}  {name}" for name, count in own.most_common(n)
+        ]
+        lines += ["", "Total time:"]
+        lines += [
+            f"{count / samples:7.1%}  {name}" for name, count in total.most_common(n)
+        ]
+        return "\n".join(lines) + "\n"
@@ -1,5 +1,5 @@
-from aiogram import Bot
 from redis.asyncio import Redis
+from app.groups import Groups
 from app.models import Lesson
 
 LESSON_REMINDER_TEXT = (
@@ -22,7 +22,7 @@ PAYMENT_REMINDER_TEXT = (
 
 
 async def send_lesson_reminder(
-    bot: Bot,
+    groups: Groups,
     redis: Redis,
     lesson_id: int,
     lesson: Lesson,
@@ -32,20 +32,14 @@ async def send_lesson_reminder(
         await redis.delete(f"cancel:{lesson_id}")
         return
 
-    chat_id = await redis.get(f"group:{lesson.group_n}")
-    if not chat_id:
-        return
-
-    await bot.send_message(
-        int(chat_id),
-        text=LESSON_REMINDER_TEXT.format(
-            subject=lesson.subject, time=lesson.start_time_msk
-        ),
+    await groups.send(
+        lesson.group_n,
+        LESSON_REMINDER_TEXT.format(subject=lesson.subject, time=lesson.start_time_msk),
     )
 
 
 async def send_homework_reminder(
-    bot: Bot,
+    groups: Groups,
     redis: Redis,
     lesson_id: int,
     lesson: Lesson,
@@ -54,31 +48,20 @@ async def send_homework_reminder(
     if await redis.get(f"cancel:{lesson_id}"):
         return
 
-    chat_id = await redis.get(f"group:{lesson.group_n}")
-    if not chat_id:
-        return
-
-    await bot.send_message(
-        int(chat_id),
-        text=HOMEWORK_REMINDER_TEXT.format(
+    await groups.send(
+        lesson.group_n,
+        HOMEWORK_REMINDER_TEXT.format(
             subject=lesson.subject, time=lesson.start_time_msk
         ),
     )
 
 
 async def send_payment_reminder(
-    bot: Bot, redis: Redis, group_n: str, payment_link: str
+    groups: Groups, payment_link: str, group_n: str
 ) -> None:
     """Каждый понедельник - напоминание об оплате"""
-    chat_id = await redis.get(f"group:{group_n}")
-    if not chat_id:
-        return
-
     text = PAYMENT_REMINDER_TEXT
     if payment_link:
         text += f"\n<b><a href='{payment_link}'>Ссылка на оплату</a></b>"
 
-    await bot.send_message(
-        chat_id=int(chat_id),
-        text=text,
-    )
+    await groups.send(group_n, text)
@@ -1,17 +1,29 @@
+import asyncio
 import re
+import threading
 
-from aiogram import Bot, Router
+from aiogram import Bot, F, Router
 from aiogram.filters import CommandStart, Command
-from aiogram.types import Message, ChatMemberUpdated
+from aiogram.types import BufferedInputFile, Message, ChatMemberUpdated
 from aiogram.enums import ChatMemberStatus
 from redis.asyncio import Redis
 
-from app.forms import AddLesson, DeleteLesson
+from app.forms import AddLesson, DeleteLesson, LessonPartial, UpdateLesson
+from app.groups import Groups
 from app.models import Lesson
+from app.profiling import LoopWatchdog, SamplingProfiler
 from app.schedule import Schedule
 
 router = Router()
 
+PROFILE_DEFAULT_SECONDS = 10
+PROFILE_MAX_SECONDS = 120
+
+LEAVE_REASONS = {
+    ChatMemberStatus.LEFT: "бот вышел из чата",
+    ChatMemberStatus.KICKED: "бота удалили из чата",
+}
+
 DAYS_RU = {
     0: "Понедельник",
     1: "Вторник",
@@ -37,7 +49,7 @@ async def on_start(msg: Message) -> None:
 
 
 @router.message(Command("add"))
-async def on_add(msg: Message, redis: Redis, schedule: Schedule) -> None:
+async def on_add(msg: Message, groups: Groups, schedule: Schedule) -> None:
     if msg.text is None:
         await msg.reply("Текст сообщения пуст")
         return
@@ -46,12 +58,8 @@ async def on_add(msg: Message, redis: Redis, schedule: Schedule) -> None:
         text = msg.text.split(maxsplit=1)[1]
         lesson = Lesson.from_str(text)
 
-        chat_id = await redis.get(f"group:{lesson.group_n}")
-        if not chat_id:
-            await msg.reply(
-                f"⚠️ Группа {lesson.group_n} не подключена!\n"
-                f"Сначала добавь бота в чат, которое содержит в названии 'Группа {lesson.group_n}'"
-            )
+        if error := await group_unavailable(groups, lesson.group_n):
+            await msg.reply(error)
             return
         
         data = AddLesson(lesson=lesson)
@@ -149,15 +157,93 @@ async def on_cancel(msg: Message, redis: Redis) -> None:
 
 
 @router.message(Command("update"))
-async def on_update(msg: Message, schedule: Schedule) -> None:
-    await msg.reply(
-        "🚧 Команда в разработке\n\n"
-        "Пока можно удалить урок через /delete и создать новый через /add"
+async def on_update(msg: Message, groups: Groups, schedule: Schedule) -> None:
+    if msg.text is None:
+        await msg.reply("Текст сообщения пуст")
+        return
+
+    try:
+        _, lesson_id_str, fields = msg.text.split(maxsplit=2)
+        lesson_id = int(lesson_id_str)
+        partial = LessonPartial.from_str(fields)
+
+        if partial.group_n is not None and (
+            error := await group_unavailable(groups, partial.group_n)
+        ):
+            await msg.reply(error)
+            return
+
+        updated = await schedule.update(
+            UpdateLesson(lesson_id=lesson_id, lesson=partial)
+        )
+        lesson = schedule.get_lesson(lesson_id)
+
+        if not updated or lesson is None:
+            await msg.reply(f"❌ Урок #{lesson_id} не найден")
+            return
+
+        await msg.reply(
+            f"✅ Урок #{lesson_id} обновлён!\n\n"
+            f"<b>{lesson.subject}</b>\n"
+            f"День: {DAYS_RU[lesson.day]}\n"
+            f"Время: {lesson.start_time_msk}\n"
+            f"Группа: {lesson.group_n}"
+        )
+    except ValueError:
+        await msg.reply(
+            "❌ Неверный формат команды.\n\n"
+            "<b>Формат:</b> <code>/update [ID урока] [поле=значение ...]</code>\n"
+            "Поля: <code>group</code>, <code>day</code>, <code>time</code> (МСК), <code>subject</code>\n\n"
+            "<b>Пример:</b> <code>/update 5 day=Вт time=11:00</code>\n\n"
+            "Посмотреть ID можно командой /list"
+        )
+
+
+@router.message(Command("profile"))
+async def on_profile(msg: Message, watchdog: LoopWatchdog) -> None:
+    if msg.text is None:
+        await msg.reply("Текст сообщения пуст")
+        return
+
+    try:
+        args = msg.text.split()[1:]
+        seconds = float(args[0]) if args else PROFILE_DEFAULT_SECONDS
+        report = args[1] if len(args) > 1 else "top"
+        if not 0 < seconds <= PROFILE_MAX_SECONDS or report not in ("top", "collapsed"):
+            raise ValueError
+    except ValueError:
+        await msg.reply(
+            "❌ Неверный формат команды.\n\n"
+            "<b>Формат:</b> <code>/profile [секунды] [top|collapsed]</code>\n\n"
+            f"<b>Пример:</b> <code>/profile 30 collapsed</code> (не больше {PROFILE_MAX_SECONDS} с)"
+        )
+        return
+
+    await msg.reply(f"⏱ Профилирую {seconds:g} с…")
+
+    profiler = SamplingProfiler(threading.get_ident())
+    await asyncio.to_thread(profiler.sample, seconds)
+
+    if report == "collapsed":
+        content = profiler.collapsed()
+    else:
+        content = profiler.top()
+        if stalls := watchdog.slowest:
+            content += "\nSlowest event loop stalls:\n"
+            for stall in stalls:
+                content += (
+                    f"\n{stall.lag * 1000:.0f} ms at {stall.at:%Y-%m-%d %H:%M:%S}\n"
+                    f"{stall.stack}"
+                )
+
+    await msg.reply_document(
+        BufferedInputFile(content.encode(), filename=f"profile-{report}.txt"),
+        caption=f"📊 {profiler.samples} сэмплов за {seconds:g} с",
     )
 
 
 @router.my_chat_member()
-async def on_bot_join(event: ChatMemberUpdated, redis: Redis, bot: Bot):
+async def on_bot_join(event: ChatMemberUpdated, groups: Groups, bot: Bot):
     if event.new_chat_member.status in [
         ChatMemberStatus.MEMBER,
         ChatMemberStatus.ADMINISTRATOR,
@@ -167,7 +253,7 @@ async def on_bot_join(event: ChatMemberUpdated, redis: Redis, bot: Bot):
 
         try:
             group_n = extract_group_number(chat_title)
-            await redis.set(f"group:{group_n}", str(chat_id))
+            await groups.connect(group_n, chat_id)
 
             await bot.send_message(
                 event.from_user.id, f"✅ Подключено к группе {group_n}!"
@@ -177,6 +263,21 @@ async def on_bot_join(event: ChatMemberUpdated, redis: Redis, bot: Bot):
                 event.from_user.id, "⚠️ Назовите чат: 'Группа 1', 'Группа 2'"
             )
             await bot.leave_chat(chat_id)
+    elif event.new_chat_member.status in [
+        ChatMemberStatus.LEFT,
+        ChatMemberStatus.KICKED,
+    ]:
+        if group_n := await groups.group_of(event.chat.id):
+            reason = LEAVE_REASONS[event.new_chat_member.status]
+            await groups.deactivate(group_n, reason)
+
+
+@router.message(F.migrate_to_chat_id)
+async def on_migrate(msg: Message, groups: Groups) -> None:
+    if msg.migrate_to_chat_id is None:
+        return
+    if group_n := await groups.group_of(msg.chat.id):
+        await groups.migrate(group_n, msg.migrate_to_chat_id)
 
 
 def extract_group_number(title: str) -> str:
@@ -184,3 +285,19 @@ def extract_group_number(title: str) -> str:
     if not maybe_number:
         raise ValueError("Cannot extract number of group from '{title}'")
     return maybe_number.group(1)
+
+
+async def group_unavailable(groups: Groups, group_n: str) -> str | None:
+    """Текст ошибки, если в группу сейчас нельзя слать напоминания"""
+    if await groups.chat_id(group_n) is not None:
+        return None
+    if group_n in await groups.inactive():
+        return (
+            f"⏸ Группа {group_n} подключена, но напоминания для неё на паузе: "
+            "чат недоступен боту.\n"
+            f"Добавь бота обратно в чат 'Группа {group_n}', чтобы их возобновить"
+        )
+    return (
+        f"⚠️ Группа {group_n} не подключена!\n"
+        f"Сначала добавь бота в чат, которое содержит в названии 'Группа {group_n}'"
+    )
@@ -0,0 +1,64 @@
+import asyncio
+import json
+from collections.abc import Callable
+from typing import Any
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover
+    uvloop = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _orjson_dumps(obj: Any) -> str:
+    # aiogram кладёт результат в multipart-форму, поэтому нужен str, а не bytes
+    return orjson.dumps(obj).decode()  # type: ignore[union-attr]
+
+
+def loop_factory(fast: bool) -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """uvloop для `asyncio.run`, если включён быстрый режим и он установлен"""
+    if fast and uvloop is not None:
+        return uvloop.new_event_loop
+    return None
+
+
+class KeepAliveSession(AiohttpSession):
+    """`AiohttpSession`, которая держит простаивающие соединения `keepalive` секунд"""
+
+    def __init__(self, keepalive: float, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._connector_init["keepalive_timeout"] = keepalive
+
+
+def create_session(
+    fast: bool,
+    pool_size: int = 100,
+    keepalive: float = 60,
+    api: TelegramAPIServer = PRODUCTION,
+) -> AiohttpSession:
+    """Сессия Bot API, общая для polling и отправки напоминаний.
+
+    Соединения держатся открытыми между пачками напоминаний, а не
+    закрываются через 15 секунд простоя, как по умолчанию в aiohttp.
+    """
+    return KeepAliveSession(
+        keepalive,
+        api=api,
+        limit=pool_size,
+        json_loads=orjson.loads if fast and orjson is not None else json.loads,
+        json_dumps=_orjson_dumps if fast and orjson is not None else json.dumps,
+    )
+
+
+def describe(session: AiohttpSession) -> dict[str, str]:
+    return {
+        "loop": type(asyncio.get_running_loop()).__module__,
+        "json": session.json_loads.__module__,
+    }
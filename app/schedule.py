@@ -1,14 +1,17 @@
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from functools import partial
-from typing import Callable, Any
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Any
 
-from aiogram import Bot
 from redis.asyncio import Redis
+from structlog import get_logger
+from structlog.types import FilteringBoundLogger
 from app.dao import LessonDAO
 from apscheduler.schedulers.asyncio import AsyncIOScheduler  # type: ignore
 from apscheduler.jobstores.base import JobLookupError  # type: ignore
-from app.forms import AddLesson, DeleteLesson, UpdateLesson
+from app.groups import Groups
+from app.forms import AddLesson, DeleteLesson, LessonPartial, UpdateLesson
 from app.models import Lesson
 from app.reminders import (
     send_homework_reminder,
@@ -16,15 +19,32 @@ from app.reminders import (
     send_payment_reminder,
 )
 
+if TYPE_CHECKING:
+    from app.sharding import ShardRouter
+
 
 @dataclass
 class Schedule:
     _dao: LessonDAO
-    _scheduler: AsyncIOScheduler = field(default_factory=AsyncIOScheduler)
+    # С крупным расписанием в одну минуту срабатывают сотни задач и часть
+    # стартует позже секунды — по умолчанию APScheduler такие пропускает
+    _scheduler: AsyncIOScheduler = field(
+        default_factory=lambda: AsyncIOScheduler(
+            job_defaults={"misfire_grace_time": 300, "coalesce": True}
+        )
+    )
     _lessons: dict[int, Lesson] = field(default_factory=dict[int, Lesson])
     _lesson_reminder: Callable[..., Any] | None = field(default=None)
     _homework_reminder: Callable[..., Any] | None = field(default=None)
     _payment_reminder: Callable[..., Any] | None = field(default=None)
+    _groups: Groups | None = field(default=None)
+    _redis: Redis | None = field(default=None)
+    _inactive_groups: set[str] = field(default_factory=set[str])
+    _owns: Callable[[str], bool] = field(default=lambda _: True)
+    _router: "ShardRouter | None" = field(default=None)
+    _logger: FilteringBoundLogger = field(
+        default_factory=lambda: get_logger().bind(event="schedule")
+    )
 
     def start(self) -> None:
         self._scheduler.start()
@@ -33,55 +53,224 @@ class Schedule:
         lessons = await self._dao.get_all()
         for lesson_id, lesson in lessons:
             self._lessons[lesson_id] = lesson
-            self._add_job(lesson_id, lesson)
+            if self._owns(lesson.group_n):
+                self._add_job(lesson_id, lesson)
 
-    def setup_reminders(self, bot: Bot, redis: Redis, payment_link: str) -> None:
-        self._lesson_reminder = partial(send_lesson_reminder, bot, redis)
-        self._homework_reminder = partial(send_homework_reminder, bot, redis)
-        self._payment_reminder = partial(
-            send_payment_reminder, bot, redis, payment_link
-        )
+    def route_to_shards(self, router: "ShardRouter") -> None:
+        """Процесс с ботом: задач не держит, а пересылает изменения воркерам"""
+        self._owns = lambda _: False
+        self._router = router
+
+    def restrict_to_shard(self, owns: Callable[[str], bool]) -> None:
+        """Воркер: держит задачи только групп, для которых `owns` истинно"""
+        self._owns = owns
+
+    def setup_reminders(self, groups: Groups, redis: Redis, payment_link: str) -> None:
+        self._lesson_reminder = partial(send_lesson_reminder, groups, redis)
+        self._homework_reminder = partial(send_homework_reminder, groups, redis)
+        self._payment_reminder = partial(send_payment_reminder, groups, payment_link)
+        self._groups = groups
+        self._redis = redis
+        groups.subscribe(self.set_group_active)
+
+    async def set_group_active(self, group_n: str, active: bool) -> None:
+        """Ставит на паузу или возобновляет все задачи группы"""
+        if self._router is not None:
+            await self._router.route(
+                group_n, {"op": "group", "group_n": group_n, "active": active}
+            )
+        self._set_jobs_active(group_n, active)
+
+    def _set_jobs_active(self, group_n: str, active: bool) -> None:
+        if active:
+            self._inactive_groups.discard(group_n)
+        else:
+            self._inactive_groups.add(group_n)
+
+        job_ids = [f"payment_reminder_{group_n}"]
+        for lesson_id, lesson in self._lessons.items():
+            if lesson.group_n == group_n:
+                job_ids += [
+                    f"lesson_reminder_{lesson_id}",
+                    f"homework_reminder_{lesson_id}",
+                ]
+
+        for job_id in job_ids:
+            try:
+                if active:
+                    self._scheduler.resume_job(job_id)  # type: ignore
+                else:
+                    self._scheduler.pause_job(job_id)  # type: ignore
+            except JobLookupError:
+                pass
+
+    async def pause_inactive_groups(self) -> None:
+        if self._groups is None:
+            return
+        # Воркеры сами восстанавливают паузы из Redis в `reload`,
+        # поэтому здесь ничего не пересылаем
+        for group_n in await self._groups.inactive():
+            self._set_jobs_active(group_n, False)
 
     def setup_payment_reminders(self) -> None:
         groups = set(lesson.group_n for lesson in self._lessons.values())
 
         for group_n in groups:
-            self._scheduler.add_job(  # type: ignore
-                self._payment_reminder,
-                trigger="cron",
-                day_of_week=0,
-                hour=9,
-                minute=0,
-                id=f"payment_reminder_{group_n}",
-                kwargs={"group_n": group_n},
-            )
+            if self._owns(group_n):
+                self._add_payment_job(group_n)
 
-    def _add_job(self, lesson_id: int, lesson: Lesson) -> None:
+    def _add_payment_job(self, group_n: str) -> None:
+        self._scheduler.add_job(  # type: ignore
+            self._payment_reminder,
+            trigger="cron",
+            day_of_week=0,
+            hour=9,
+            minute=0,
+            id=f"payment_reminder_{group_n}",
+            kwargs={"group_n": group_n},
+            replace_existing=True,
+        )
+
+    def _ensure_payment_job(self, group_n: str) -> None:
+        job_id = f"payment_reminder_{group_n}"
+        if self._payment_reminder is None or self._scheduler.get_job(job_id):  # type: ignore
+            return
+        self._add_payment_job(group_n)
+        if group_n in self._inactive_groups:
+            self._scheduler.pause_job(job_id)  # type: ignore
+
+    def _remove_payment_job_if_unused(self, group_n: str) -> None:
+        if any(lesson.group_n == group_n for lesson in self._lessons.values()):
+            return
+        try:
+            self._scheduler.remove_job(f"payment_reminder_{group_n}")  # type: ignore
+        except JobLookupError:
+            pass
+
+    @staticmethod
+    def _lesson_trigger(lesson: Lesson) -> dict[str, int]:
         reminder_time = (
             datetime.combine(datetime.today(), lesson.start_time)
             - timedelta(minutes=30)
         ).time()
+        return {
+            "day_of_week": lesson.day,
+            "hour": reminder_time.hour,
+            "minute": reminder_time.minute,
+        }
+
+    @staticmethod
+    def _homework_trigger(lesson: Lesson) -> dict[str, int]:
+        return {"day_of_week": lesson.day, "hour": 8, "minute": 0}
 
+    def _add_job(self, lesson_id: int, lesson: Lesson) -> None:
         self._scheduler.add_job(  # type: ignore
             self._lesson_reminder,
             trigger="cron",
-            day_of_week=lesson.day,
-            hour=reminder_time.hour,
-            minute=reminder_time.minute,
             id=f"lesson_reminder_{lesson_id}",
             kwargs={"lesson_id": lesson_id, "lesson": lesson},
+            **self._lesson_trigger(lesson),
         )
 
         self._scheduler.add_job(  # type: ignore
             self._homework_reminder,
             trigger="cron",
-            day_of_week=lesson.day,
-            hour=8,
-            minute=0,
             id=f"homework_reminder_{lesson_id}",
             kwargs={"lesson_id": lesson_id, "lesson": lesson},
+            **self._homework_trigger(lesson),
         )
 
+    def _apply_group_state(
+        self, lesson_id: int, lesson: Lesson, was_paused: bool = False
+    ) -> None:
+        """Задачи неактивной группы ставит на паузу, а ушедшие из неё возобновляет.
+
+        `reschedule_job` снимает паузу, поэтому после него задачи неактивной
+        группы надо приостановить заново. Активные задачи не трогаем:
+        `resume_job` пересчитал бы триггер, который не менялся.
+        """
+        if lesson.group_n in self._inactive_groups:
+            set_state = self._scheduler.pause_job
+        elif was_paused:
+            set_state = self._scheduler.resume_job
+        else:
+            return
+        for job_type in ["lesson_reminder", "homework_reminder"]:
+            set_state(f"{job_type}_{lesson_id}")  # type: ignore
+
+    def _update_jobs(
+        self, lesson_id: int, lesson: Lesson, changes: LessonPartial
+    ) -> int:
+        """Трогает только те задачи, на которые влияют изменённые поля.
+
+        Возвращает количество пересчитанных триггеров.
+        """
+        kwargs = {"lesson_id": lesson_id, "lesson": lesson}
+        rescheduled = 0
+
+        # Текст напоминаний берётся из kwargs, поэтому их обновляем всегда,
+        # а триггер пересчитываем только при смене дня или времени
+        job_id = f"lesson_reminder_{lesson_id}"
+        self._scheduler.modify_job(job_id, kwargs=kwargs)  # type: ignore
+        if changes.day is not None or changes.start_time is not None:
+            self._scheduler.reschedule_job(  # type: ignore
+                job_id, trigger="cron", **self._lesson_trigger(lesson)
+            )
+            rescheduled += 1
+
+        # Домашка всегда в 8:00, время урока на неё не влияет
+        job_id = f"homework_reminder_{lesson_id}"
+        self._scheduler.modify_job(job_id, kwargs=kwargs)  # type: ignore
+        if changes.day is not None:
+            self._scheduler.reschedule_job(  # type: ignore
+                job_id, trigger="cron", **self._homework_trigger(lesson)
+            )
+            rescheduled += 1
+
+        return rescheduled
+
+    def _remove_jobs(self, lesson_id: int) -> None:
+        for job_type in ["lesson_reminder", "homework_reminder"]:
+            try:
+                self._scheduler.remove_job(f"{job_type}_{lesson_id}")  # type: ignore
+            except JobLookupError:
+                pass
+
+    def _schedule_lesson(self, lesson_id: int, lesson: Lesson) -> None:
+        if not self._owns(lesson.group_n):
+            return
+        self._add_job(lesson_id, lesson)
+        self._apply_group_state(lesson_id, lesson)
+        self._ensure_payment_job(lesson.group_n)
+
+    def _unschedule_lesson(self, lesson_id: int, lesson: Lesson) -> None:
+        """Вызывается, когда урока уже нет в `_lessons` под старой группой"""
+        self._remove_jobs(lesson_id)
+        self._remove_payment_job_if_unused(lesson.group_n)
+
+    def _reschedule_lesson(
+        self, lesson_id: int, old: Lesson, new: Lesson, changes: LessonPartial
+    ) -> int:
+        owned_old, owned_new = self._owns(old.group_n), self._owns(new.group_n)
+
+        if owned_old and owned_new:
+            rescheduled = self._update_jobs(lesson_id, new, changes)
+            if rescheduled or changes.group_n is not None:
+                was_paused = old.group_n in self._inactive_groups
+                self._apply_group_state(lesson_id, new, was_paused)
+            if changes.group_n is not None:
+                self._ensure_payment_job(new.group_n)
+                self._remove_payment_job_if_unused(old.group_n)
+            return rescheduled
+
+        # Урок переехал между шардами
+        if owned_old:
+            self._unschedule_lesson(lesson_id, old)
+        if owned_new:
+            self._schedule_lesson(lesson_id, new)
+            return 2
+        return 0
+
     async def get_all_lessons(self) -> list[tuple[int, Lesson]]:
         return list(self._lessons.items())
 
@@ -90,33 +279,58 @@ class Schedule:
 
     async def add(self, form: AddLesson) -> None:
         lesson_id = await self._dao.insert(form.lesson)
-        self._add_job(lesson_id, form.lesson)
         self._lessons[lesson_id] = form.lesson
+        self._schedule_lesson(lesson_id, form.lesson)
+        if self._router is not None:
+            await self._router.route(
+                form.lesson.group_n, _lesson_command("add", lesson_id, form.lesson)
+            )
 
     async def update(self, form: UpdateLesson) -> bool:
         if form.lesson_id not in self._lessons:
             return False
 
         old_lesson = self._lessons[form.lesson_id]
+        changes = form.lesson.diff(old_lesson)
+        if not changes.model_dump(exclude_none=True):
+            return True
+
+        await self._dao.update(form.lesson_id, changes)
 
-        lesson: Lesson = old_lesson or form.lesson
-        new_lesson = Lesson(
-            group_n=lesson.group_n,
-            day=lesson.day,
-            start_time=lesson.start_time,
-            subject=lesson.subject,
+        new_lesson = old_lesson.model_copy(
+            update=changes.model_dump(exclude_none=True)
         )
+        self._lessons[form.lesson_id] = new_lesson
 
-        await self._dao.update(form.lesson_id, new_lesson)
+        # /cancel отменял урок у прежней группы, новой группе он не мешает
+        if changes.group_n is not None and self._redis is not None:
+            await self._redis.delete(f"cancel:{form.lesson_id}")
 
-        for job_type in ["lesson_reminder", "homework_reminder"]:
-            try:
-                self._scheduler.remove_job(f"{job_type}_{form.lesson_id}")  # type: ignore
-            except JobLookupError:
-                pass
+        started = perf_counter()
+        rescheduled = self._reschedule_lesson(
+            form.lesson_id, old_lesson, new_lesson, changes
+        )
+        elapsed_ms = (perf_counter() - started) * 1000
 
-        self._add_job(form.lesson_id, new_lesson)
-        self._lessons[form.lesson_id] = new_lesson
+        if self._router is not None:
+            owner = await self._router.route(
+                new_lesson.group_n,
+                _lesson_command("update", form.lesson_id, new_lesson),
+            )
+            if changes.group_n is not None:
+                await self._router.route(
+                    old_lesson.group_n,
+                    {"op": "delete", "lesson_id": form.lesson_id},
+                    skip=owner,
+                )
+
+        await self._logger.ainfo(
+            "Updated lesson_id=%s, fields=%s, rescheduled=%s, reschedule_ms=%.3f",
+            form.lesson_id,
+            sorted(changes.model_dump(exclude_none=True)),
+            rescheduled,
+            elapsed_ms,
+        )
         return True
 
     async def delete(self, form: DeleteLesson) -> bool:
@@ -125,11 +339,86 @@ class Schedule:
 
         await self._dao.delete(form.lesson_id)
 
-        for job_type in ["lesson_reminder", "homework_reminder"]:
-            try:
-                self._scheduler.remove_job(f"{job_type}_{form.lesson_id}")  # type: ignore
-            except JobLookupError:
-                pass
-
-        del self._lessons[form.lesson_id]
+        lesson = self._lessons.pop(form.lesson_id)
+        self._unschedule_lesson(form.lesson_id, lesson)
+        if self._router is not None:
+            await self._router.route(
+                lesson.group_n, {"op": "delete", "lesson_id": form.lesson_id}
+            )
         return True
+
+    async def apply(self, command: dict[str, Any]) -> None:
+        """Изменение, пришедшее воркеру от `ShardRouter`. В базе оно уже есть"""
+        match command:
+            case {"op": "add" | "update", "lesson_id": int(lesson_id), "lesson": data}:
+                lesson = Lesson.model_validate(data)
+                old = self._lessons.get(lesson_id)
+                self._lessons[lesson_id] = lesson
+                if old is None:
+                    self._schedule_lesson(lesson_id, lesson)
+                else:
+                    changes = LessonPartial.model_validate(data).diff(old)
+                    self._reschedule_lesson(lesson_id, old, lesson, changes)
+            case {"op": "delete", "lesson_id": int(lesson_id)}:
+                if (lesson := self._lessons.pop(lesson_id, None)) is not None:
+                    self._unschedule_lesson(lesson_id, lesson)
+            case {"op": "group", "group_n": str(group_n), "active": bool(active)}:
+                await self.set_group_active(group_n, active)
+            case _:
+                await self._logger.awarning("Unknown shard command %s", command)
+
+    async def reload(self) -> None:
+        """Сверяет задачи с базой и текущим шардом.
+
+        Трогает только уроки, которые сменили владельца или изменились,
+        так что при перебалансировке пересоздаётся лишь доля задач.
+        """
+        started = perf_counter()
+        fresh = dict(await self._dao.get_all())
+        stale, self._lessons = self._lessons, fresh
+
+        added = removed = 0
+        for lesson_id in stale.keys() | fresh.keys():
+            lesson = fresh.get(lesson_id)
+            job = self._scheduler.get_job(f"lesson_reminder_{lesson_id}")  # type: ignore
+            scheduled = job is not None
+            wanted = lesson is not None and self._owns(lesson.group_n)
+
+            if scheduled and (not wanted or stale.get(lesson_id) != lesson):
+                self._remove_jobs(lesson_id)
+                scheduled = False
+                removed += 1
+            if wanted and not scheduled:
+                assert lesson is not None
+                self._schedule_lesson(lesson_id, lesson)
+                added += 1
+
+        owned_groups = {
+            lesson.group_n for lesson in fresh.values() if self._owns(lesson.group_n)
+        }
+        for job in self._scheduler.get_jobs():  # type: ignore
+            group_n = job.id.removeprefix("payment_reminder_")
+            if group_n != job.id and group_n not in owned_groups:
+                job.remove()
+
+        # Пропущенная команда "group" чинится здесь же: набор неактивных
+        # групп всегда берётся из Redis, а не накапливается
+        if self._groups is not None:
+            inactive = await self._groups.inactive()
+            for group_n in self._inactive_groups - inactive:
+                self._set_jobs_active(group_n, True)
+            for group_n in inactive:
+                self._set_jobs_active(group_n, False)
+
+        await self._logger.ainfo(
+            "Reloaded %s lessons, owned=%s, added=%s, removed=%s, reload_ms=%.3f",
+            len(fresh),
+            sum(self._owns(lesson.group_n) for lesson in fresh.values()),
+            added,
+            removed,
+            (perf_counter() - started) * 1000,
+        )
+
+
+def _lesson_command(op: str, lesson_id: int, lesson: Lesson) -> dict[str, Any]:
+    return {"op": op, "lesson_id": lesson_id, "lesson": lesson.model_dump(mode="json")}
@@ -0,0 +1,172 @@
+import asyncio
+import bisect
+import hashlib
+import json
+from collections.abc import Iterable
+from time import monotonic, time
+from typing import TYPE_CHECKING, Any
+
+from redis.asyncio import Redis
+from structlog import get_logger
+from structlog.types import FilteringBoundLogger
+
+if TYPE_CHECKING:
+    from app.schedule import Schedule
+
+WORKERS_KEY = "shard:workers"
+MEMBERSHIP_CHANNEL = "shard:membership"
+DEFAULT_TTL = 15.0
+
+
+def commands_channel(worker_id: str) -> str:
+    return f"shard:commands:{worker_id}"
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+
+
+class HashRing:
+    """Консистентное хэширование групп по воркерам.
+
+    У каждого воркера `replicas` виртуальных точек на кольце, поэтому
+    при входе или выходе воркера переезжает только ~1/N групп.
+    """
+
+    def __init__(self, workers: Iterable[str], replicas: int = 64) -> None:
+        points = sorted(
+            (_hash(f"{worker}#{i}"), worker)
+            for worker in workers
+            for i in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    def owner(self, group_n: str) -> str | None:
+        if not self._hashes:
+            return None
+        i = bisect.bisect(self._hashes, _hash(group_n)) % len(self._hashes)
+        return self._workers[i]
+
+
+async def live_workers(redis: Redis, ttl: float = DEFAULT_TTL) -> list[str]:
+    members = await redis.zrangebyscore(WORKERS_KEY, time() - ttl, "+inf")
+    return sorted(member.decode() for member in members)
+
+
+class ShardRouter:
+    """Отправляет изменения расписания воркеру, который владеет группой"""
+
+    def __init__(self, redis: Redis, ttl: float = DEFAULT_TTL) -> None:
+        self._redis = redis
+        self._ttl = ttl
+        self._logger: FilteringBoundLogger = get_logger().bind(event="shard")
+
+    async def route(
+        self, group_n: str, command: dict[str, Any], skip: str | None = None
+    ) -> str | None:
+        """Возвращает воркера-владельца группы; `skip` ему ничего не шлёт"""
+        owner = HashRing(await live_workers(self._redis, self._ttl)).owner(group_n)
+        if owner is None:
+            await self._logger.awarning(
+                "No live workers, %s for group %s will be picked up on start",
+                command["op"],
+                group_n,
+            )
+            return None
+        if owner != skip:
+            await self._redis.publish(commands_channel(owner), json.dumps(command))
+        return owner
+
+
+class ShardWorker:
+    """Воркер, который держит задачи только своих групп.
+
+    Раз в `ttl / 3` секунд воркер отмечается в `shard:workers` и убирает
+    оттуда молчащих дольше `ttl`. Любое изменение состава сообщается в
+    `shard:membership`, после чего каждый воркер пересчитывает кольцо и
+    сверяет задачи с базой. Раз в `resync` секунд сверка идёт в любом
+    случае, на случай потерянных сообщений pub/sub.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        schedule: "Schedule",
+        worker_id: str,
+        ttl: float = DEFAULT_TTL,
+        resync: float = 300,
+    ) -> None:
+        self._redis = redis
+        self._schedule = schedule
+        self._worker_id = worker_id
+        self._ttl = ttl
+        self._resync = resync
+        self._members: list[str] = []
+        self._ring = HashRing([])
+        self._lock = asyncio.Lock()
+        self._logger: FilteringBoundLogger = get_logger().bind(event="shard")
+
+    def owns(self, group_n: str) -> bool:
+        return self._ring.owner(group_n) == self._worker_id
+
+    async def run(self) -> None:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(commands_channel(self._worker_id), MEMBERSHIP_CHANNEL)
+        await self._beat()
+        await self._redis.publish(MEMBERSHIP_CHANNEL, f"join:{self._worker_id}")
+        await self._rebalance(force=True)
+
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                # Ошибку одного сообщения исправит следующая полная сверка
+                try:
+                    if message["channel"] == MEMBERSHIP_CHANNEL.encode():
+                        await self._rebalance()
+                        continue
+                    async with self._lock:
+                        await self._schedule.apply(json.loads(message["data"]))
+                except Exception:
+                    await self._logger.aexception(
+                        "Failed to handle %s", message["data"]
+                    )
+        finally:
+            heartbeat.cancel()
+            await pubsub.aclose()
+            await self._redis.zrem(WORKERS_KEY, self._worker_id)
+            await self._redis.publish(MEMBERSHIP_CHANNEL, f"leave:{self._worker_id}")
+
+    async def _beat(self) -> None:
+        now = time()
+        await self._redis.zadd(WORKERS_KEY, {self._worker_id: now})
+        if await self._redis.zremrangebyscore(WORKERS_KEY, "-inf", now - self._ttl):
+            await self._redis.publish(MEMBERSHIP_CHANNEL, "expired")
+
+    async def _heartbeat(self) -> None:
+        synced = monotonic()
+        while True:
+            await asyncio.sleep(self._ttl / 3)
+            try:
+                await self._beat()
+                if monotonic() - synced >= self._resync:
+                    await self._rebalance(force=True)
+                    synced = monotonic()
+                else:
+                    await self._rebalance()
+            except Exception:
+                # Без отметок остальные воркеры исключат этот из кольца
+                await self._logger.aexception("Heartbeat failed, retrying")
+
+    async def _rebalance(self, force: bool = False) -> None:
+        async with self._lock:
+            members = await live_workers(self._redis, self._ttl)
+            if members == self._members and not force:
+                return
+            if members != self._members:
+                await self._logger.ainfo("Workers %s -> %s", self._members, members)
+            self._members = members
+            self._ring = HashRing(members)
+            await self._schedule.reload()
@@ -0,0 +1,59 @@
+"""Процесс-воркер для шардированной рассылки напоминаний.
+
+Запускается рядом с ботом (`SHARD_WORKERS` > 0) как `python -m app.worker`.
+Миграции применяет процесс с ботом, воркер только читает расписание.
+"""
+
+import asyncio
+import os
+import socket
+
+import structlog
+
+from app.config import (
+    DATABASE_URL,
+    FAST_RUNTIME,
+    LOOP_STALL_THRESHOLD_MS,
+    OWNER_TGID,
+    PAYMENT_LINK,
+    WORKER_ID,
+    create_bot,
+    create_redis,
+    setup_logging,
+)
+from app.db import connect
+from app.groups import Groups
+from app.profiling import LoopWatchdog
+from app.runtime import describe, loop_factory
+from app.schedule import Schedule
+from app.sharding import ShardWorker
+
+
+async def main() -> None:
+    setup_logging()
+
+    watchdog = LoopWatchdog(threshold=LOOP_STALL_THRESHOLD_MS / 1000)
+    watchdog.start()
+
+    db = await connect(DATABASE_URL)
+    redis = await create_redis()
+    bot = create_bot()
+    await structlog.get_logger().ainfo("Runtime", **describe(bot.session))  # type: ignore
+
+    worker_id = WORKER_ID or f"{socket.gethostname()}-{os.getpid()}"
+    schedule = Schedule(db.lesson_dao())
+    worker = ShardWorker(redis, schedule, worker_id)
+    schedule.restrict_to_shard(worker.owns)
+    schedule.setup_reminders(Groups(bot, redis, OWNER_TGID), redis, PAYMENT_LINK)
+    schedule.start()
+
+    try:
+        # Задачи своего шарда worker загрузит сам при первой перебалансировке
+        await worker.run()
+    finally:
+        await bot.session.close()
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(), loop_factory=loop_factory(FAST_RUNTIME))
@@ -0,0 +1,113 @@
+"""Пропускная способность отправки сообщений через фейковый Bot API.
+
+Фейковый сервер работает в отдельном процессе и на каждый sendMessage
+отвечает готовым Message. Клиент отправляет сообщения с заданной
+конкурентностью через стандартную сессию aiogram, через настроенный пул
+соединений и в быстром режиме (пул + uvloop + orjson).
+
+    uv run --extra fast python -m benchmarks.send_messages
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+from time import perf_counter, process_time, sleep, time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+from app.runtime import create_session, loop_factory, uvloop
+
+TOKEN = "42:bench"
+CHAT_ID = -100
+
+
+def _serve(port: int) -> None:
+    message = {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": CHAT_ID, "type": "supergroup", "title": "Группа 1"},
+        "text": "⏰ Напоминание о занятии",
+    }
+    body = json.dumps({"ok": True, "result": message})
+    received: list[float] = []
+
+    async def handle(_: web.Request) -> web.Response:
+        received.append(time())
+        return web.Response(text=body, content_type="application/json")
+
+    async def stats(_: web.Request) -> web.Response:
+        """Время получения каждого запроса, для замеров задержки"""
+        return web.json_response(received)
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    app.router.add_get("/stats", stats)
+    web.run_app(
+        app,
+        port=port,
+        print=None,
+        access_log=None,
+        loop=uvloop.new_event_loop() if uvloop else None,
+    )
+
+
+async def _run(
+    port: int, mode: str, messages: int, concurrency: int
+) -> tuple[float, float]:
+    """Возвращает сообщения в секунду и микросекунды CPU клиента на сообщение"""
+    api = TelegramAPIServer.from_base(f"http://127.0.0.1:{port}")
+    if mode == "stock":
+        session = AiohttpSession(api=api)
+    else:
+        session = create_session(mode == "fast", pool_size=concurrency, api=api)
+    bot = Bot(token=TOKEN, session=session)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(i: int) -> None:
+        async with semaphore:
+            await bot.send_message(CHAT_ID, f"⏰ Напоминание #{i}")
+
+    await asyncio.gather(*(send(i) for i in range(concurrency)))  # прогрев пула
+    started, cpu_started = perf_counter(), process_time()
+    await asyncio.gather(*(send(i) for i in range(messages)))
+    elapsed, cpu = perf_counter() - started, process_time() - cpu_started
+    await bot.session.close()
+    return messages / elapsed, cpu / messages * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=_serve, args=(args.port,), daemon=True)
+    server.start()
+    sleep(1)
+
+    try:
+        for mode in ("stock", "pooled", "fast"):
+            results = [
+                asyncio.run(
+                    _run(args.port, mode, args.messages, args.concurrency),
+                    loop_factory=loop_factory(mode == "fast"),
+                )
+                for _ in range(args.rounds)
+            ]
+            rate, cpu = max(results)[0], min(results, key=lambda r: r[1])[1]
+            print(
+                f"{mode:>6}: {rate:8.0f} msg/s, {cpu:6.0f} µs CPU/msg "
+                f"(best of {args.rounds})"
+            )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Пропускная способность и задержка напоминаний в зависимости от числа воркеров.
+
+Все уроки назначены на одну минуту, как в пиковое время. Для каждого
+числа воркеров поднимаются настоящие `python -m app.worker`, которые
+шлют напоминания в фейковый Bot API. Задержка считается от начала
+минуты срабатывания до получения запроса фейковым сервером.
+
+Нужен живой Redis, база — временный файл SQLite:
+
+    uv run python -m benchmarks.sharding --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import urllib.request
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import sleep, time
+
+from redis.asyncio import from_url
+
+from benchmarks.send_messages import TOKEN, _serve
+
+STARTUP_SECONDS = 8
+
+
+async def _prepare(
+    db_url: str, redis_url: str, groups: int, lessons: int, fire_at: datetime
+) -> None:
+    os.environ.update(
+        BOT_TOKEN=TOKEN, DATABASE_URL=db_url, REDIS_URL=redis_url, OWNER_TGID="1"
+    )
+    from app.__main__ import apply_migrations
+    from app.db import connect
+    from app.models import Lesson
+
+    db = await connect(db_url)
+    await apply_migrations(db)
+    dao = db.lesson_dao()
+    start = (fire_at + timedelta(minutes=30)).time()
+    for i in range(lessons):
+        lesson = Lesson(
+            group_n=str(i % groups),
+            day=fire_at.weekday(),
+            start_time=start,
+            subject="Б",
+        )
+        await dao.insert(lesson)
+    await db.close()
+
+    redis = await from_url(redis_url)
+    await redis.flushdb()
+    for n in range(groups):
+        await redis.set(f"group:{n}", str(-1000 - n))
+    await redis.aclose()
+
+
+def _received(port: int) -> list[float]:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as resp:
+        return json.loads(resp.read())
+
+
+def _round(args: argparse.Namespace, workers: int) -> str:
+    # Минута срабатывания с запасом на старт всех воркеров
+    ready_at = datetime.now() + timedelta(seconds=STARTUP_SECONDS * workers + 5)
+    fire_at = ready_at.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        asyncio.run(
+            _prepare(db_url, args.redis_url, args.groups, args.lessons, fire_at)
+        )
+        before = len(_received(args.port))
+
+        env = os.environ | {
+            "BOT_TOKEN": TOKEN,
+            "DATABASE_URL": db_url,
+            "REDIS_URL": args.redis_url,
+            "OWNER_TGID": "1",
+            "BOT_API_URL": f"http://127.0.0.1:{args.port}",
+        }
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-m", "app.worker"],
+                env=env | {"WORKER_ID": f"bench-{i}"},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            for i in range(workers)
+        ]
+        try:
+            deadline = fire_at.timestamp() + args.drain
+            while time() < deadline:
+                if len(_received(args.port)) - before >= args.lessons:
+                    break
+                sleep(0.5)
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+    received = _received(args.port)[before:]
+    if not received:
+        return f"{workers:>3} workers: no reminders received"
+    lags = sorted(t - fire_at.timestamp() for t in received)
+    span = max(received) - min(received) or 1e-9
+    return (
+        f"{workers:>3} workers: {len(received):5}/{args.lessons} sent, "
+        f"{len(received) / span:7.0f} msg/s, "
+        f"lag p50 {statistics.median(lags) * 1000:6.0f} ms, "
+        f"p95 {lags[int(len(lags) * 0.95) - 1] * 1000:6.0f} ms, "
+        f"max {lags[-1] * 1000:6.0f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--groups", type=int, default=200)
+    parser.add_argument("--lessons", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--drain", type=float, default=60)
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=_serve, args=(args.port,), daemon=True)
+    server.start()
+    sleep(1)
+
+    try:
+        print(f"cpus: {os.cpu_count()}, lessons: {args.lessons}, groups: {args.groups}")
+        for workers in args.workers:
+            print(_round(args, workers), flush=True)
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
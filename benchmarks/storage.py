@@ -0,0 +1,96 @@
+"""Холодный старт хранилища и RSS процесса бота для разных DATABASE_URL.
+
+Каждый замер — отдельный процесс: импорт, подключение, миграции и загрузка
+всех уроков, как при старте бота. RSS меряется только у процесса бота,
+память самого сервера Postgres (контейнера) добавляется сверху.
+
+    uv run python -m benchmarks.storage sqlite:///bench.db postgresql://...
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+STARTED = perf_counter()
+
+
+async def _child(url: str, seed: int) -> None:
+    from datetime import time
+
+    os.environ.setdefault("BOT_TOKEN", "42:bench")
+    os.environ.setdefault("REDIS_URL", "redis://localhost")
+    os.environ.setdefault("OWNER_TGID", "1")
+    os.environ["DATABASE_URL"] = url
+
+    from app.__main__ import apply_migrations
+    from app.db import connect
+    from app.models import Lesson
+
+    connecting = perf_counter()
+    db = await connect(url)
+    await apply_migrations(db)
+    dao = db.lesson_dao()
+    lessons = await dao.get_all()
+    storage_seconds = perf_counter() - connecting
+    for i in range(len(lessons), seed):
+        lesson = Lesson(
+            group_n=str(i % 20), day=i % 7, start_time=time(i % 24), subject="Урок"
+        )
+        await dao.insert(lesson)
+    await db.close()
+
+    print(
+        json.dumps(
+            {
+                "seconds": perf_counter() - STARTED,
+                "storage_seconds": storage_seconds,
+                "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                "lessons": len(lessons),
+            }
+        )
+    )
+
+
+def _run(url: str, seed: int = 0) -> dict[str, float]:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.storage", "--child", url, str(seed)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def main() -> None:
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        import asyncio
+
+        asyncio.run(_child(sys.argv[2], int(sys.argv[3])))
+        return
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--lessons", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for url in args.urls:
+        _run(url, seed=args.lessons)
+        results = [_run(url) for _ in range(args.runs)]
+        total = statistics.median(r["seconds"] for r in results) * 1000
+        storage = statistics.median(r["storage_seconds"] for r in results) * 1000
+        print(
+            f"{url.split('://')[0]:>10}: cold start {total:6.0f} ms "
+            f"(storage {storage:5.1f} ms), "
+            f"RSS {max(r['rss_mb'] for r in results):5.1f} MB, "
+            f"{int(results[0]['lessons'])} lessons (median of {args.runs})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+CREATE TABLE lessons (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_n VARCHAR(50) NOT NULL,
+    -- 0=Monday, 6=Sunday
+    day_of_week SMALLINT NOT NULL CHECK (day_of_week >= 0 AND day_of_week <= 6),
+    -- Время начала урока в UTC, 'HH:MM:SS'
+    start_time TEXT NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_lessons_group_day ON lessons(group_n, day_of_week, start_time);
+CREATE INDEX idx_lessons_day ON lessons(day_of_week);
\ No newline at end of file
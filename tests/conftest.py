@@ -0,0 +1,78 @@
+from collections.abc import AsyncIterator
+from datetime import time
+from fnmatch import fnmatch
+from typing import Any
+
+from app.forms import LessonPartial
+from app.models import Lesson
+from app.schedule import Schedule
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+        self.sets: dict[str, set[str]] = {}
+
+    async def smembers(self, key: str) -> set[bytes]:
+        return {member.encode() for member in self.sets.get(key, set())}
+
+    async def get(self, key: str | bytes) -> bytes | None:
+        return self.values.get(key.decode() if isinstance(key, bytes) else key)
+
+    async def set(self, key: str, value: str) -> None:
+        self.values[key] = value.encode()
+
+    async def delete(self, key: str) -> None:
+        self.values.pop(key, None)
+
+    async def scan_iter(self, match: str) -> AsyncIterator[bytes]:
+        for key in list(self.values):
+            if fnmatch(key, match):
+                yield key.encode()
+
+    async def sismember(self, key: str, member: str) -> bool:
+        return member in self.sets.get(key, set())
+
+    async def sadd(self, key: str, member: str) -> int:
+        members = self.sets.setdefault(key, set())
+        added = member not in members
+        members.add(member)
+        return int(added)
+
+    async def srem(self, key: str, member: str) -> int:
+        members = self.sets.setdefault(key, set())
+        removed = member in members
+        members.discard(member)
+        return int(removed)
+
+
+class FakeDAO:
+    def __init__(self, lessons: dict[int, Lesson]) -> None:
+        self.lessons = lessons
+
+    async def get_all(self) -> list[tuple[int, Lesson]]:
+        return list(self.lessons.items())
+
+    async def update(self, lesson_id: int, changes: LessonPartial) -> None:
+        pass
+
+
+def lesson(group_n: str, subject: str = "Физика") -> Lesson:
+    return Lesson(group_n=group_n, day=0, start_time=time(7), subject=subject)
+
+
+async def _noop(**_: Any) -> None:
+    pass
+
+
+def make_schedule(
+    lessons: dict[int, Lesson], groups: Any = None, redis: Any = None
+) -> Schedule:
+    """`Schedule` на фейковой базе; без `groups` напоминания ничего не шлют"""
+    schedule = Schedule(FakeDAO(lessons))  # type: ignore
+    if groups is not None:
+        schedule.setup_reminders(groups, redis or FakeRedis(), "")
+    else:
+        schedule._lesson_reminder = schedule._homework_reminder = _noop
+        schedule._payment_reminder = _noop
+    return schedule
@@ -0,0 +1,24 @@
+from datetime import time
+import pytest
+from app.forms import LessonPartial
+from app.models import Lesson
+
+
+def test_successful_parsing_partial():
+    assert LessonPartial.from_str("day=Вт time=11:00 subject=Физика 9 класс") == (
+        LessonPartial(day=1, start_time=time(hour=8), subject="Физика 9 класс")
+    )
+
+
+@pytest.mark.parametrize(
+    "text", ["", "Математика", "room=5", "group=первая", "day=Пн day=Вт", "subject="]
+)
+def test_parsing_incorrect_partial(text: str):
+    with pytest.raises(ValueError):
+        LessonPartial.from_str(text)
+
+
+def test_diff_keeps_only_changed_fields():
+    lesson = Lesson(group_n="1", day=0, start_time=time(hour=7), subject="Физика")
+    partial = LessonPartial(group_n="1", day=2, start_time=time(hour=7))
+    assert partial.diff(lesson) == LessonPartial(day=2)
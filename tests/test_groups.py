@@ -0,0 +1,166 @@
+import asyncio
+from datetime import time
+from typing import Any
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramMigrateToChat
+from aiogram.methods import SendMessage
+
+from app.forms import LessonPartial, UpdateLesson
+from app.groups import Groups
+from app.router import group_unavailable
+from tests.conftest import FakeRedis, lesson, make_schedule
+
+OWNER_ID = 1
+
+
+class FakeBot:
+    def __init__(self, errors: dict[int, Exception]) -> None:
+        self.errors = errors
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str, **_: Any) -> None:
+        if error := self.errors.get(chat_id):
+            raise error
+        self.sent.append((chat_id, text))
+
+
+def make_groups(errors: dict[int, Exception]) -> tuple[Groups, FakeBot, list[Any]]:
+    bot, redis = FakeBot(errors), FakeRedis()
+    redis.values["group:1"] = b"-100"
+    groups = Groups(bot, redis, OWNER_ID)  # type: ignore
+    events: list[Any] = []
+
+    async def listener(group_n: str, active: bool) -> None:
+        events.append((group_n, active))
+
+    groups.subscribe(listener)
+    return groups, bot, events
+
+
+def test_migrated_group_is_repointed():
+    method = SendMessage(chat_id=-100, text="")
+    groups, bot, _ = make_groups(
+        {-100: TelegramMigrateToChat(method, "migrated", migrate_to_chat_id=-200)}
+    )
+
+    assert asyncio.run(groups.send("1", "hi"))
+    assert (-200, "hi") in bot.sent
+    assert asyncio.run(groups.chat_id("1")) == -200
+    assert asyncio.run(groups.group_of(-200)) == "1"
+    assert asyncio.run(groups.group_of(-100)) is None
+
+
+def test_chat_index_is_backfilled():
+    groups, _, _ = make_groups({})
+    assert asyncio.run(groups.group_of(-100)) is None
+
+    asyncio.run(groups.index_chats())
+    assert asyncio.run(groups.group_of(-100)) == "1"
+
+
+def test_kicked_group_is_deactivated_once():
+    method = SendMessage(chat_id=-100, text="")
+    groups, bot, events = make_groups(
+        {-100: TelegramForbiddenError(method, "bot was kicked")}
+    )
+
+    assert not asyncio.run(groups.send("1", "hi"))
+    assert not asyncio.run(groups.send("1", "hi"))
+    assert events == [("1", False)]
+    assert [chat_id for chat_id, _ in bot.sent] == [OWNER_ID]
+
+    asyncio.run(groups.connect("1", -300))
+    assert events == [("1", False), ("1", True)]
+    assert asyncio.run(groups.chat_id("1")) == -300
+
+
+def test_paused_group_stays_paused_after_update():
+    async def run() -> list[Any]:
+        groups, _, _ = make_groups({})
+        schedule = make_schedule({1: lesson("1")}, groups)
+        schedule.start()
+        await schedule.load()
+        schedule.setup_payment_reminders()
+
+        await groups.deactivate("1", "тест")
+        await schedule.update(
+            UpdateLesson(
+                lesson_id=1,
+                lesson=LessonPartial(day=2, start_time=time(9)),  # type: ignore
+            )
+        )
+        paused = [job.next_run_time for job in schedule._scheduler.get_jobs()]
+        assert len(paused) == 3
+
+        # После перезапуска пауза восстанавливается из Redis
+        restarted = make_schedule({1: lesson("1")}, groups)
+        restarted.start()
+        await restarted.load()
+        await restarted.pause_inactive_groups()
+        paused += [job.next_run_time for job in restarted._scheduler.get_jobs()]
+
+        await groups.connect("1", -300)
+        return paused + [job.next_run_time for job in schedule._scheduler.get_jobs()]
+
+    next_runs = asyncio.run(run())
+    assert next_runs[:5] == [None] * 5
+    assert all(next_runs[5:])
+
+
+def test_paused_group_has_own_message():
+    groups, _, _ = make_groups({})
+    asyncio.run(groups.deactivate("1", "тест"))
+
+    assert "на паузе" in (asyncio.run(group_unavailable(groups, "1")) or "")
+    assert "не подключена" in (asyncio.run(group_unavailable(groups, "2")) or "")
+
+
+def test_update_touches_only_affected_triggers():
+    async def run() -> tuple[list[str], list[Any]]:
+        groups, _, _ = make_groups({})
+        await groups.connect("2", -200)
+        schedule = make_schedule({1: lesson("1")}, groups)
+        schedule.start()
+        await schedule.load()
+
+        resumed: list[str] = []
+        resume_job = schedule._scheduler.resume_job
+        schedule._scheduler.resume_job = lambda job_id: (  # type: ignore
+            resumed.append(job_id),
+            resume_job(job_id),
+        )
+
+        await schedule.update(
+            UpdateLesson(lesson_id=1, lesson=LessonPartial(start_time=time(9)))  # type: ignore
+        )
+        assert resumed == []
+
+        await groups.deactivate("1", "тест")
+        await schedule.update(
+            UpdateLesson(lesson_id=1, lesson=LessonPartial(group_n="2"))  # type: ignore
+        )
+        return resumed, [job.next_run_time for job in schedule._scheduler.get_jobs()]
+
+    resumed, next_runs = asyncio.run(run())
+    assert resumed == ["lesson_reminder_1", "homework_reminder_1"]
+    assert all(next_runs)
+
+
+def test_update_clears_cancel_only_on_group_change():
+    async def run() -> list[bool]:
+        groups, _, _ = make_groups({})
+        redis = FakeRedis()
+        schedule = make_schedule({1: lesson("1")}, groups, redis)
+        await schedule.load()
+
+        await redis.set("cancel:1", "1")
+        await schedule.update(
+            UpdateLesson(lesson_id=1, lesson=LessonPartial(start_time=time(9)))  # type: ignore
+        )
+        kept = await redis.get("cancel:1") is not None
+        await schedule.update(
+            UpdateLesson(lesson_id=1, lesson=LessonPartial(group_n="2"))  # type: ignore
+        )
+        return [kept, await redis.get("cancel:1") is not None]
+
+    assert asyncio.run(run()) == [True, False]
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+
+from app.profiling import LoopWatchdog, SamplingProfiler
+
+
+def blocking_callback() -> None:
+    time.sleep(0.3)
+
+
+def test_watchdog_catches_blocking_callback():
+    async def run() -> LoopWatchdog:
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.01)
+        watchdog.start()
+        await asyncio.sleep(0.05)
+        blocking_callback()
+        await asyncio.sleep(0.05)
+        watchdog.stop()
+        return watchdog
+
+    stalls = asyncio.run(run()).slowest
+    assert stalls and stalls[0].lag >= 0.2
+    assert "blocking_callback" in stalls[0].stack
+
+
+def test_watchdog_keeps_stack_of_short_stalls():
+    async def run() -> LoopWatchdog:
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.05)
+        watchdog.start()
+        for _ in range(5):
+            await asyncio.sleep(0.06)
+            time.sleep(0.16)
+        await asyncio.sleep(0.06)
+        watchdog.stop()
+        return watchdog
+
+    stalls = asyncio.run(run()).slowest
+    assert stalls
+    assert all("test_profiling.py" in stall.stack for stall in stalls)
+
+
+def test_profiler_samples_target_thread():
+    done = threading.Event()
+    worker = threading.Thread(target=lambda: done.wait(1))
+    worker.start()
+
+    assert worker.ident is not None
+    profiler = SamplingProfiler(worker.ident, interval=0.001)
+    profiler.sample(0.05)
+    done.set()
+    worker.join()
+
+    assert profiler.samples > 0
+    assert "Event.wait" in profiler.collapsed()
+    assert "Self time:" in profiler.top(5)
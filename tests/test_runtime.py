@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+from app import runtime
+
+
+def test_default_session_uses_stdlib_json():
+    session = runtime.create_session(False)
+    assert session.json_loads is json.loads
+    assert session.json_dumps is json.dumps
+    assert runtime.loop_factory(False) is None
+
+
+@pytest.mark.skipif(runtime.orjson is None, reason="orjson is not installed")
+def test_fast_session_dumps_str():
+    session = runtime.create_session(True, pool_size=10, keepalive=30)
+    assert session.json_dumps({"text": "Группа 1"}) == '{"text":"Группа 1"}'
+    assert session._connector_init["limit"] == 10
+    assert session._connector_init["keepalive_timeout"] == 30
+
+
+def test_fast_mode_falls_back_without_extras(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(runtime, "uvloop", None)
+    monkeypatch.setattr(runtime, "orjson", None)
+    assert runtime.loop_factory(True) is None
+    assert runtime.create_session(True).json_loads is json.loads
@@ -0,0 +1,130 @@
+import asyncio
+from typing import Any
+
+from app.sharding import HashRing, ShardWorker
+from tests.conftest import lesson, make_schedule
+
+GROUPS = [str(n) for n in range(1000)]
+
+
+def test_ring_moves_only_joined_share():
+    before = HashRing(["w1", "w2", "w3"])
+    after = HashRing(["w1", "w2", "w3", "w4"])
+
+    moved = [g for g in GROUPS if before.owner(g) != after.owner(g)]
+    assert all(after.owner(g) == "w4" for g in moved)
+    assert 150 < len(moved) < 350
+    assert HashRing([]).owner("1") is None
+
+
+def test_worker_keeps_only_its_groups():
+    async def run() -> list[str]:
+        owned = {"1"}
+        schedule = make_schedule({1: lesson("1"), 2: lesson("2")})
+        schedule.restrict_to_shard(lambda group_n: group_n in owned)
+        schedule.start()
+
+        await schedule.reload()
+        jobs = {job.id for job in schedule._scheduler.get_jobs()}
+        assert jobs == {
+            "lesson_reminder_1",
+            "homework_reminder_1",
+            "payment_reminder_1",
+        }
+
+        await schedule.apply(
+            {"op": "update", "lesson_id": 2, "lesson": lesson("1").model_dump()}
+        )
+        await schedule.apply({"op": "delete", "lesson_id": 1})
+        schedule._dao.lessons = {2: lesson("1")}  # type: ignore
+
+        owned = {"2"}
+        await schedule.reload()
+        return sorted(job.id for job in schedule._scheduler.get_jobs())
+
+    assert asyncio.run(run()) == []
+
+
+class FakeGroups:
+    def __init__(self) -> None:
+        self.inactive_groups: set[str] = set()
+
+    async def inactive(self) -> set[str]:
+        return self.inactive_groups
+
+
+def test_reload_resumes_group_reactivated_elsewhere():
+    async def run() -> list[Any]:
+        owned = {"7"}
+        groups = FakeGroups()
+        schedule = make_schedule({1: lesson("7")})
+        schedule._groups = groups  # type: ignore
+        schedule.restrict_to_shard(lambda group_n: group_n in owned)
+        schedule.start()
+
+        groups.inactive_groups = {"7"}
+        await schedule.reload()
+        assert schedule._scheduler.get_job("lesson_reminder_1").next_run_time is None
+
+        # Группа ушла другому воркеру, там её и включили
+        owned = set()
+        await schedule.reload()
+        groups.inactive_groups = set()
+
+        owned = {"7"}
+        await schedule.reload()
+        return [job.next_run_time for job in schedule._scheduler.get_jobs()]
+
+    next_runs = asyncio.run(run())
+    assert len(next_runs) == 3
+    assert all(next_runs)
+
+
+def test_heartbeat_survives_errors():
+    class FlakyRedis:
+        def __init__(self) -> None:
+            self.beats = 0
+
+        async def zadd(self, *_: Any) -> None:
+            self.beats += 1
+            if self.beats == 1:
+                raise ConnectionError("redis is down")
+
+        async def zremrangebyscore(self, *_: Any) -> int:
+            return 0
+
+        async def zrangebyscore(self, *_: Any) -> list[bytes]:
+            return [b"w1"]
+
+    async def run() -> int:
+        redis = FlakyRedis()
+        schedule = make_schedule({})
+        worker = ShardWorker(redis, schedule, "w1", ttl=0.03)  # type: ignore
+        heartbeat = asyncio.create_task(worker._heartbeat())
+        await asyncio.sleep(0.1)
+        assert not heartbeat.done()
+        heartbeat.cancel()
+        return redis.beats
+
+    assert asyncio.run(run()) > 1
+
+
+def test_bot_does_not_route_pauses_on_start():
+    class FakeRouter:
+        def __init__(self) -> None:
+            self.commands: list[dict[str, Any]] = []
+
+        async def route(self, group_n: str, command: dict[str, Any]) -> None:
+            self.commands.append(command)
+
+    async def run() -> list[dict[str, Any]]:
+        groups, router = FakeGroups(), FakeRouter()
+        groups.inactive_groups = {"1", "2"}
+        schedule = make_schedule({1: lesson("1")})
+        schedule._groups = groups  # type: ignore
+        schedule.route_to_shards(router)  # type: ignore
+        await schedule.load()
+        await schedule.pause_inactive_groups()
+        return router.commands
+
+    assert asyncio.run(run()) == []
@@ -0,0 +1,45 @@
+import asyncio
+from datetime import time
+from pathlib import Path
+
+from app.db import SQLiteDatabase, connect
+from app.forms import LessonPartial
+from app.models import Lesson
+
+
+async def migrated() -> SQLiteDatabase:
+    db = await connect("sqlite://")
+    assert isinstance(db, SQLiteDatabase)
+    assert await db.schema_version() == 0
+    for version, migration in enumerate(sorted(db.migrations_dir.glob("*.sql")), 1):
+        await db.apply_migration(version, migration.name, migration.read_text())
+    return db
+
+
+def test_sqlite_lessons_roundtrip():
+    async def run() -> None:
+        db = await migrated()
+        dao = db.lesson_dao()
+        lesson = Lesson(group_n="1", day=0, start_time=time(7, 30), subject="Физика")
+
+        lesson_id = await dao.insert(lesson)
+        await dao.update(lesson_id, LessonPartial(day=2, subject="Химия"))
+        assert await dao.get_all() == [
+            (lesson_id, lesson.model_copy(update={"day": 2, "subject": "Химия"}))
+        ]
+
+        await dao.delete(lesson_id)
+        assert await dao.get_all() == []
+        assert await db.schema_version() == 1
+        await db.close()
+
+    asyncio.run(run())
+
+
+def test_sqlite_creates_missing_directory(tmp_path: Path):
+    async def run() -> None:
+        db = await connect(f"sqlite:///{tmp_path / 'data' / 'bot.db'}")
+        await db.close()
+
+    asyncio.run(run())
+    assert (tmp_path / "data" / "bot.db").exists()